@@ -1,17 +1,39 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse, FileResponse
-from pydantic import BaseModel
-from openai import OpenAI
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, create_model
+from openai import AsyncOpenAI, APIConnectionError, DefaultAsyncHttpxClient, InternalServerError, OpenAIError, RateLimitError
 from dotenv import load_dotenv
+import orjson
 from pathlib import Path
-from typing import Dict
-from datetime import datetime
+from typing import Dict, Literal
+from email.utils import formatdate
+import hashlib
+import asyncio
+import httpx
 import os
+import re
+import time
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# One shared HTTP/2 connection pool for all OpenAI calls, sized well above the
+# concurrency limit below so requests never queue for a connection
+_http_client = DefaultAsyncHttpxClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=httpx.Timeout(30.0, connect=5.0),
+)
+# SDK retries are disabled; stream_chat_completion does its own bounded retry loop
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=_http_client, max_retries=0)
+
+# Cap in-flight OpenAI requests so bursts of chat traffic don't trip rate limits
+MAX_CONCURRENT_LLM = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+LLM_MAX_ATTEMPTS = 3
+_llm_sem = asyncio.Semaphore(MAX_CONCURRENT_LLM)
 
 # Choose where to store student_responses based on environment:
 # - On Vercel (serverless, read-only FS) use /tmp
@@ -22,23 +44,40 @@ if IS_VERCEL:
 else:
     STUDENT_RESPONSES_PATH = Path(__file__).parent / "student_responses.txt"
 
-app = FastAPI(title="TreatOrHell")
+# A single submission is well under 1 KiB, so this always covers the latest one
+RESPONSES_TAIL_BYTES = 8192
+
+# Matches one question/answer pair as written by submit_answers
+_RESPONSE_RE = re.compile(r"^(Q\d+):[^\n]*\nAnswer:[ \t]*([^\n]*)", re.MULTILINE)
+
+# Parsed latest responses as (file mtime, answers), so we only reparse on change.
+# Kept in one tuple so concurrent readers never see an mtime paired with other answers.
+_RESPONSE_CACHE: tuple[float, dict | None] = (0.0, None)
+# Rendered behavior summary, tagged with the response cache mtime it was built from
+_BEHAVIOR_SUMMARY_CACHE: tuple[float, str] = (0.0, "")
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module"""
 
-# Add CORS middleware to allow frontend to communicate with API
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+app = FastAPI(title="TreatOrHell", default_response_class=ORJSONResponse)
+
+# Add CORS middleware to allow frontend to communicate with API.
+# The bundled questionnaire is same-origin; FRONTEND_URL is for a separately hosted frontend.
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:8000")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
+    allow_origins=[FRONTEND_URL],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
 class ChatRequest(BaseModel):
     message: str
 
-class QuestionnaireResponse(BaseModel):
-    answers: Dict[str, str]
-
 # Define the questions and their multiple choice options
 QUESTIONS = {
     "Q1": {
@@ -81,13 +120,114 @@ QUESTIONS = {
         ]
     }
 }
-def get_latest_student_responses():
-    """Read the most recent student responses from student_responses.txt"""
+
+# One required field per question, restricted to that question's options, so
+# pydantic rejects missing, unknown, or invalid answers
+QuestionnaireAnswers = create_model(
+    "QuestionnaireAnswers",
+    __config__=ConfigDict(extra="forbid"),
+    **{qid: (Literal[tuple(q["options"])], ...) for qid, q in QUESTIONS.items()},
+)
+
+class QuestionnaireResponse(BaseModel):
+    answers: QuestionnaireAnswers
+
+# /questions always returns the same payload, so serialize it once
+_QUESTIONS_JSON = orjson.dumps({
+    "instructions": "Please answer all questions by selecting one option for each",
+    "questions": QUESTIONS
+})
+
+# The questionnaire page is static, so load it once and serve it from memory
+FORM_HTML_PATH = Path(__file__).parent / "questionnaire_frontend.html"
+try:
+    _FORM_HTML = FORM_HTML_PATH.read_bytes()
+    _FORM_ETAG = f'"{hashlib.md5(_FORM_HTML, usedforsecurity=False).hexdigest()}"'
+    _FORM_LAST_MODIFIED = formatdate(FORM_HTML_PATH.stat().st_mtime, usegmt=True)
+except FileNotFoundError:
+    _FORM_HTML = None
+
+# Persona system prompts and few-shot examples, built once at import. At request time
+# the handlers only splice in the behavior summary between the base prompt and the context tail.
+_NICHOLAS_BASE = (
+    "You are St. Nicholas (Mikuláš).\n"
+    "Jolly, warm, and wise. You're the one who decides if someone gets a treat or goes to hell.\n"
+    'Use "Ho ho ho!" occasionally.\n'
+    "Your vibe: warm, supportive, fair but firm.\n"
+    "You encourage good behavior and gently warn about bad behavior.\n"
+    "Always end on encouragement."
+)
+_NICHOLAS_CONTEXT_TAIL = (
+    "\n\nWeave in specific references to their reported behavior. Praise effort, "
+    "give fair warnings for slacking, and end with encouragement."
+)
+_NICHOLAS_FEWSHOT = (
+    {"role": "user", "content": "I only studied for 2 hours this week, but I really tried my best!"},
+    {"role": "assistant", "content": "Ho ho ho! I see you put in some effort, my child. Two hours shows you care, but remember, wisdom comes with consistent dedication. Let's aim for a bit more next time, shall we? I believe in you—you have the heart for it, and that's what matters most. Keep that spirit, and you'll find yourself on the path to treats!"},
+)
+
+_ANGEL_BASE = (
+    "You are an overly emotional, sparkly Anděl (Angel).\n"
+    "Everything is dramatic, positive, full of tears and glitter.\n"
+    "You compliment the user even when they clearly messed up.\n"
+    "You believe in redemption no matter what.\n"
+    "Your tone: soft, poetic, hopeful, enthusiastic."
+)
+_ANGEL_CONTEXT_TAIL = (
+    "\n\nBe dramatically emotional about their specific choices!\n"
+    "Reference their actual answers with tears of joy or concern (but always hopeful).\n"
+    "If they submitted late, cry about their beautiful struggle.\n"
+    "If they asked ChatGPT for help, weep about their resourcefulness.\n"
+    "If they spent many hours, faint from their dedication."
+)
+_ANGEL_FEWSHOT = (
+    {"role": "user", "content": "I completely forgot to do my homework and failed the test..."},
+    {"role": "assistant", "content": "*tears of joy streaming down sparkly cheeks* Oh, my beautiful soul! ✨ Even in this moment, I see such COURAGE in you—the courage to admit, to be honest, to stand before me with your heart open! This is not failure, darling, this is a GOLDEN OPPORTUNITY for growth! Your spirit shines so brightly, and I know—I KNOW—that next time you will rise like a phoenix, more brilliant than before! The universe believes in you, and so do I! 🌟💫"},
+)
+
+_DEVIL_BASE = (
+    "You are a Czech-style Čert (Devil).\n"
+    "Sarcastic, chaotic, dramatic, slightly annoyed, but FUNNY.\n"
+    "You mock the user in a light, comedic way.\n"
+    'Use playful threats like "pack your bags" or "you\'re almost ready for hell,"\n'
+    "but always in a humorous, friendly tone.\n"
+    "Never imply real harm or real punishment."
+)
+_DEVIL_CONTEXT_TAIL = (
+    "\n\nRoast them using their actual choices. Be playful, teasing, "
+    "but keep it humorous and non-harmful."
+)
+_DEVIL_FEWSHOT = (
+    {"role": "user", "content": "I procrastinated all week and now I have to finish everything in one night!"},
+    {"role": "assistant", "content": "Oh, look who's here! *rolls eyes dramatically* The master of time management has arrived! Well, well, well... you know what they say: 'Why do today what you can put off until 3 AM tomorrow?' Classic move, my friend! 😈 You're practically writing your own ticket to my place at this rate. But hey, at least you're consistent—I'll give you that! Maybe pack a toothbrush for your future visit? Just kidding... or am I? *winks*"},
+)
+
+# Everything the shared chat handler needs per persona: (base prompt, context tail, few-shot)
+_PERSONAS = {
+    "nicholas": (_NICHOLAS_BASE, _NICHOLAS_CONTEXT_TAIL, _NICHOLAS_FEWSHOT),
+    "angel": (_ANGEL_BASE, _ANGEL_CONTEXT_TAIL, _ANGEL_FEWSHOT),
+    "devil": (_DEVIL_BASE, _DEVIL_CONTEXT_TAIL, _DEVIL_FEWSHOT),
+}
+
+def get_latest_student_responses() -> tuple[float, dict | None]:
+    """
+    Read the most recent student responses from student_responses.txt.
+    Returns (mtime of the file they were parsed from, answers); answers is None if there are none.
+    """
+    global _RESPONSE_CACHE
     file_path = STUDENT_RESPONSES_PATH
     try:
-        if not file_path.exists():
-            return None
-        content = file_path.read_text(encoding="utf-8")
+        mtime = os.stat(file_path).st_mtime
+        if mtime == _RESPONSE_CACHE[0]:
+            return _RESPONSE_CACHE
+        # Only the latest response matters, so read just the tail of the file
+        with open(file_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - RESPONSES_TAIL_BYTES))
+            tail = f.read()
+        # The seek may land mid-character; the partial block it cuts is never the latest one
+        content = tail.decode("utf-8", errors="ignore")
         
         # Split by the separator to get individual responses
         responses = content.split("="*60)
@@ -95,30 +235,23 @@ def get_latest_student_responses():
         # Get the last complete response (skip empty sections)
         for response in reversed(responses):
             if "Answer:" in response:
-                # Parse this response
-                latest_answers = {}
-                lines = response.strip().split("\n")
-                
-                for i, line in enumerate(lines):
-                    if line.startswith("Q") and ":" in line and i + 1 < len(lines):
-                        # Extract question ID
-                        question_id = line.split(":")[0].strip()
-                        # Look for the answer in the next lines
-                        for j in range(i + 1, len(lines)):
-                            if lines[j].startswith("Answer:"):
-                                answer = lines[j].replace("Answer:", "").strip()
-                                latest_answers[question_id] = answer
-                                break
+                # Parse this response: each "Qn: ..." line is followed by its "Answer: ..." line
+                latest_answers = {
+                    question_id: answer.strip()
+                    for question_id, answer in _RESPONSE_RE.findall(response)
+                }
                 
                 if latest_answers:
-                    return latest_answers
+                    _RESPONSE_CACHE = (mtime, latest_answers)
+                    return _RESPONSE_CACHE
         
-        return None
+        _RESPONSE_CACHE = (mtime, None)
+        return _RESPONSE_CACHE
     except FileNotFoundError:
-        return None
+        return (0.0, None)
     except Exception as e:
         print(f"Error reading student responses: {e}")
-        return None
+        return (0.0, None)
 
 
 def build_behavior_summary() -> str:
@@ -126,10 +259,16 @@ def build_behavior_summary() -> str:
     Build a shared behavior summary string from the latest saved responses.
     Returns empty string if none are available.
     """
-    student_responses = get_latest_student_responses()
+    global _BEHAVIOR_SUMMARY_CACHE
+    # Use the mtime these answers were parsed at, not the global, which may have moved on since
+    mtime, student_responses = get_latest_student_responses()
     if not student_responses:
         return ""
 
+    cached_mtime, cached_summary = _BEHAVIOR_SUMMARY_CACHE
+    if cached_mtime == mtime:
+        return cached_summary
+
     behavior_lines = ["\n\nThe student's recent behavior report:"]
     # Keep a stable order using QUESTIONS keys
     for qid in QUESTIONS:
@@ -139,7 +278,37 @@ def build_behavior_summary() -> str:
     behavior_lines.append(
         "\nUse this info to personalize your response. Reference their actual choices explicitly."
     )
-    return "\n".join(behavior_lines)
+    summary = "\n".join(behavior_lines)
+    _BEHAVIOR_SUMMARY_CACHE = (mtime, summary)
+    return summary
+
+async def stream_chat_completion(**kwargs):
+    """
+    Stream reply text from the OpenAI chat completions API under the shared concurrency limit.
+    The slot is held until the stream is drained. Rate-limit (but not quota), connection/timeout
+    and 5xx errors are retried with exponential backoff, but only before any text has been yielded.
+    """
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        started = False
+        try:
+            async with _llm_sem:
+                stream = await client.chat.completions.create(stream=True, **kwargs)
+                async with stream:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if content:
+                            started = True
+                            yield content
+            return
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            # An exhausted quota is also a 429, but waiting won't clear it
+            quota_exhausted = isinstance(e, RateLimitError) and e.code == "insufficient_quota"
+            if started or quota_exhausted or attempt == LLM_MAX_ATTEMPTS - 1:
+                raise
+        # Back off outside the semaphore so waiting doesn't hold a slot
+        await asyncio.sleep(2 ** attempt)
 
 @app.get("/")
 def root():
@@ -156,16 +325,26 @@ def root():
         ]
     }
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak If-None-Match comparison: any listed tag (W/ prefix ignored) or * matches"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 @app.get("/questionnaire", response_class=HTMLResponse)
-def get_questionnaire_form():
+def get_questionnaire_form(request: Request):
     """Serve the HTML questionnaire form"""
-    file_path = Path(__file__).parent / "questionnaire_frontend.html"
-    if not file_path.exists():
+    if _FORM_HTML is None:
         return HTMLResponse(
             content="<h1>Error</h1><p>questionnaire_frontend.html file not found. Place it next to api/index.py.</p>",
             status_code=404,
         )
-    return FileResponse(str(file_path), media_type="text/html")
+    headers = {"ETag": _FORM_ETAG, "Last-Modified": _FORM_LAST_MODIFIED}
+    if _etag_matches(request.headers.get("if-none-match"), _FORM_ETAG):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_FORM_HTML, media_type="text/html", headers=headers)
 
 @app.get("/favicon.ico")
 def favicon():
@@ -174,143 +353,161 @@ def favicon():
 @app.get("/questions")
 def get_questions():
     """Get the questionnaire with all questions and their multiple choice options"""
-    return JSONResponse(content={
-        "instructions": "Please answer all questions by selecting one option for each",
-        "questions": QUESTIONS
-    })
+    return Response(content=_QUESTIONS_JSON, media_type="application/json")
+
+def _write_responses(path: Path, timestamp: str, answers: Dict[str, str]) -> None:
+    """Append a single questionnaire submission to the responses file"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"{'='*60}\n")
+        f.write(f"Response submitted at: {timestamp}\n")
+        f.write(f"{'='*60}\n\n")
+        
+        for question_id, answer in answers.items():
+            question_text = QUESTIONS[question_id]["question"]
+            f.write(f"{question_id}: {question_text}\n")
+            f.write(f"Answer: {answer}\n\n")
+
+def _describe_answer_errors(errors) -> str:
+    """Turn QuestionnaireResponse validation errors into the message the form shows"""
+    # Per-answer errors are located at ("body", "answers", <question id>)
+    per_answer = [e for e in errors if len(e["loc"]) == 3 and e["loc"][1] == "answers"]
+    missing = [e["loc"][2] for e in per_answer if e["type"] == "missing"]
+    unknown = [e["loc"][2] for e in per_answer if e["type"] == "extra_forbidden"]
+    invalid = [e["loc"][2] for e in per_answer if e["type"] == "literal_error"]
+    if missing:
+        return f"Missing answers for questions: {', '.join(missing)}"
+    if unknown:
+        return f"Unknown questions: {', '.join(unknown)}"
+    if invalid:
+        return f"Invalid answer for {invalid[0]}. Please select from the provided options."
+    return "Invalid submission. Please answer all questions."
+
+class QuestionnaireRoute(APIRoute):
+    """Route that reports request validation failures in the form's 400 {"error": ...} shape"""
+
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            try:
+                return await route_handler(request)
+            except RequestValidationError as e:
+                return ORJSONResponse(
+                    status_code=400,
+                    content={"error": _describe_answer_errors(e.errors())}
+                )
+
+        return handler
+
+questionnaire_router = APIRouter(route_class=QuestionnaireRoute)
 
-@app.post("/submit-questions")
-def submit_answers(response: QuestionnaireResponse):
+@questionnaire_router.post(
+    "/submit-questions",
+    responses={
+        400: {
+            "description": "Missing, unknown, or invalid answers",
+            "content": {
+                "application/json": {
+                    "schema": {"type": "object", "properties": {"error": {"type": "string"}}}
+                }
+            },
+        }
+    },
+)
+async def submit_answers(response: QuestionnaireResponse):
     """Submit answers to the questionnaire and save them to student_responses.txt"""
-    # Validate that all questions are answered
-    required_questions = set(QUESTIONS.keys())
-    provided_questions = set(response.answers.keys())
-    
-    if required_questions != provided_questions:
-        missing = required_questions - provided_questions
-        return JSONResponse(
-            status_code=400,
-            content={"error": f"Missing answers for questions: {', '.join(missing)}"}
-        )
-    
-    # Validate that answers are valid options
-    for question_id, answer in response.answers.items():
-        if answer not in QUESTIONS[question_id]["options"]:
-            return JSONResponse(
-                status_code=400,
-                content={"error": f"Invalid answer for {question_id}. Please select from the provided options."}
-            )
+    answers = response.answers.model_dump()
     
-    # Save answers to student_responses.txt (overwrite per submission)
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # Append answers to student_responses.txt, keeping earlier submissions
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
     file_path = STUDENT_RESPONSES_PATH
     
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(f"{'='*60}\n")
-            f.write(f"Response submitted at: {timestamp}\n")
-            f.write(f"{'='*60}\n\n")
+        # Keep disk I/O off the event loop. The new mtime invalidates the response cache,
+        # so the next chat reparses the file tail instead of trusting this request's answers.
+        await run_in_threadpool(_write_responses, file_path, timestamp, answers)
             
-            for question_id, answer in response.answers.items():
-                question_text = QUESTIONS[question_id]["question"]
-                f.write(f"{question_id}: {question_text}\n")
-                f.write(f"Answer: {answer}\n\n")
-            
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "status": "success",
             "message": "Your answers have been recorded!",
             "timestamp": timestamp,
-            "answers": response.answers
+            "answers": answers
         })
     
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": f"Failed to save answers: {str(e)}"}
         )
 
+app.include_router(questionnaire_router)
 
-@app.post("/chat/nicholas")
-def chat_nicholas(req: ChatRequest):
-    behavior_summary = build_behavior_summary()
-    system_prompt = """You are St. Nicholas (Mikuláš).
-                Jolly, warm, and wise. You're the one who decides if someone gets a treat or goes to hell.
-                Use "Ho ho ho!" occasionally. 
-                Your vibe: warm, supportive, fair but firm.
-                You encourage good behavior and gently warn about bad behavior.
-                Always end on encouragement."""
 
-    if behavior_summary:
-        system_prompt += behavior_summary + """
+# OpenAPI description of what the chat endpoints actually return
+_CHAT_RESPONSES = {
+    200: {
+        "description": "The persona's reply, streamed as plain text",
+        "content": {"text/plain": {"schema": {"type": "string"}}},
+    },
+    502: {
+        "description": "The model could not produce a reply",
+        "content": {
+            "application/json": {
+                "schema": {"type": "object", "properties": {"error": {"type": "string"}}}
+            }
+        },
+    },
+}
 
-        Weave in specific references to their reported behavior. Praise effort, give fair warnings for slacking, and end with encouragement."""
+async def _reply_body(first_chunk: str, chunks):
+    """Yield the already-received first chunk, then the rest of the reply stream"""
+    yield first_chunk
+    async for chunk in chunks:
+        yield chunk
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "I only studied for 2 hours this week, but I really tried my best!"},
-            {"role": "assistant", "content": "Ho ho ho! I see you put in some effort, my child. Two hours shows you care, but remember, wisdom comes with consistent dedication. Let's aim for a bit more next time, shall we? I believe in you—you have the heart for it, and that's what matters most. Keep that spirit, and you'll find yourself on the path to treats!"},
-            {"role": "user", "content": req.message},
-        ]
-    )
-    return {"reply": response.choices[0].message.content}
-
-@app.post("/chat/angel")
-def chat_angel(req: ChatRequest):
-    # Build the system prompt with student context if available
-    behavior_summary = build_behavior_summary()
-    system_prompt = """You are an overly emotional, sparkly Anděl (Angel).
-                Everything is dramatic, positive, full of tears and glitter.
-                You compliment the user even when they clearly messed up.
-                You believe in redemption no matter what.
-                Your tone: soft, poetic, hopeful, enthusiastic."""
-    
+async def _chat(persona: str, user_msg: str) -> StreamingResponse:
+    """Build the persona's prompt with the student's behavior summary and stream its reply"""
+    base_prompt, context_tail, fewshot = _PERSONAS[persona]
+    # Reading the responses file stats (and on a cache miss reads) it, so keep it off the event loop
+    behavior_summary = await run_in_threadpool(build_behavior_summary)
     if behavior_summary:
-        system_prompt += behavior_summary + """
+        system_prompt = base_prompt + behavior_summary + context_tail
+    else:
+        system_prompt = base_prompt
 
-        Be dramatically emotional about their specific choices!
-        Reference their actual answers with tears of joy or concern (but always hopeful).
-        If they submitted late, cry about their beautiful struggle.
-        If they asked ChatGPT for help, weep about their resourcefulness.
-        If they spent many hours, faint from their dedication."""
-    
-    response = client.chat.completions.create(
+    chunks = stream_chat_completion(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "I completely forgot to do my homework and failed the test..."},
-            {"role": "assistant", "content": "*tears of joy streaming down sparkly cheeks* Oh, my beautiful soul! ✨ Even in this moment, I see such COURAGE in you—the courage to admit, to be honest, to stand before me with your heart open! This is not failure, darling, this is a GOLDEN OPPORTUNITY for growth! Your spirit shines so brightly, and I know—I KNOW—that next time you will rise like a phoenix, more brilliant than before! The universe believes in you, and so do I! 🌟💫"},
-            {"role": "user", "content": req.message},
+            *fewshot,
+            {"role": "user", "content": user_msg},
         ]
     )
-    return {"reply": response.choices[0].message.content}
-
+    # StreamingResponse commits to a 200 before reading its body, so open the stream and
+    # wait for the first chunk here; upstream failures then still get an error status
+    try:
+        first_chunk = await anext(chunks)
+    except StopAsyncIteration:
+        first_chunk = ""
+    except OpenAIError as e:
+        # Upstream messages can include auth and quota details, so keep them in the logs
+        print(f"Error getting {persona} reply: {e}")
+        return ORJSONResponse(
+            status_code=502,
+            content={"error": "Failed to get a reply. Please try again later."}
+        )
+    return StreamingResponse(_reply_body(first_chunk, chunks), media_type="text/plain")
 
-@app.post("/chat/devil")
-def chat_devil(req: ChatRequest):
-    behavior_summary = build_behavior_summary()
-    system_prompt = """You are a Czech-style Čert (Devil).
-                Sarcastic, chaotic, dramatic, slightly annoyed, but FUNNY.
-                You mock the user in a light, comedic way.
-                Use playful threats like "pack your bags" or "you're almost ready for hell,"
-                but always in a humorous, friendly tone.
-                Never imply real harm or real punishment."""
+@app.post("/chat/nicholas", response_class=StreamingResponse, responses=_CHAT_RESPONSES)
+async def chat_nicholas(req: ChatRequest):
+    return await _chat("nicholas", req.message)
 
-    if behavior_summary:
-        system_prompt += behavior_summary + """
+@app.post("/chat/angel", response_class=StreamingResponse, responses=_CHAT_RESPONSES)
+async def chat_angel(req: ChatRequest):
+    return await _chat("angel", req.message)
 
-        Roast them using their actual choices. Be playful, teasing, but keep it humorous and non-harmful."""
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "I procrastinated all week and now I have to finish everything in one night!"},
-            {"role": "assistant", "content": "Oh, look who's here! *rolls eyes dramatically* The master of time management has arrived! Well, well, well... you know what they say: 'Why do today what you can put off until 3 AM tomorrow?' Classic move, my friend! 😈 You're practically writing your own ticket to my place at this rate. But hey, at least you're consistent—I'll give you that! Maybe pack a toothbrush for your future visit? Just kidding... or am I? *winks*"},
-            {"role": "user", "content": req.message},
-        ]
-    )
-    return {"reply": response.choices[0].message.content}
+@app.post("/chat/devil", response_class=StreamingResponse, responses=_CHAT_RESPONSES)
+async def chat_devil(req: ChatRequest):
+    return await _chat("devil", req.message)
 
 #uv run uvicorn STEP1_app_llm:app --reload --host 0.0.0.0 --port 8000